@@ -1,13 +1,141 @@
 from typing import Callable, Tuple, Iterator
+import warnings
 
 from sklearn.base import BaseEstimator, ClassifierMixin
 from sklearn.utils.validation import check_array, check_X_y, check_is_fitted
 from sklearn.utils.multiclass import unique_labels
+from joblib import Parallel, delayed
+from numba import config as numba_config, get_num_threads, literally, njit, prange, set_num_threads
 import numpy as np
+import pandas as pd
 from tqdm import tqdm
 
+try:
+    import cupy as cp
+except ImportError:
+    cp = None
+
 from undefine_scores import accuracy_undefine_score
 
+# Number of train rows intersected with a test row at once. Extents of the whole block
+# are computed in one sweep over train data, so each train row is loaded once per block.
+SEED_BLOCK_SIZE = 16
+# Upper bound of (train rows x seeds x columns) elements compared at once on GPU.
+GPU_BLOCK_ELEMENTS = 2 ** 26
+# Problems with less (train rows x test rows x columns) elements are computed on CPU even
+# for device='cuda', upload and kernel launches cost more than they save.
+GPU_MIN_ELEMENTS = 2 ** 24
+DEVICES = ('cpu', 'cuda')
+
+
+@njit(parallel=True, cache=True)
+def _predict_kernel(
+        X_test_num, X_test_cat, X_train_num, X_train_cat, Y_train,
+        sorted_num, order_num, sorted_cat, order_cat,
+        interval_mode, min_extent_size, consistency_threshold, check_number, min_checked):
+    """
+    Predict labels for all test rows at once. Intersection and extent computation are fused,
+    test rows are processed in parallel.
+    sorted_num, order_num, sorted_cat, order_cat: np.array
+        Column index of train data built by LazyFCA._build_column_index.
+    interval_mode: int
+        0 for basic interval, 1 for min_inf_interval, 2 for max_inf_interval.
+        Kernel is compiled separately for each mode, so the choice costs nothing in the loops.
+
+    Returns
+    -------
+    prediction: np.array
+        int8 array with 0 or 1 for classified rows and -1 otherwise.
+    confidence: np.array
+        float32 array with confidence of classified rows and nan otherwise.
+    """
+    literally(interval_mode)
+    n_test = X_test_num.shape[0]
+    n_train, n_num = X_train_num.shape
+    n_cat = X_train_cat.shape[1]
+    prediction = np.full(n_test, -1, dtype=np.int8)
+    confidence = np.full(n_test, np.nan, dtype=np.float32)
+    all_rows = np.arange(n_train)
+
+    for i in prange(n_test):
+        lo = np.empty_like(X_train_num[0])
+        hi = np.empty_like(X_train_num[0])
+        intersection_cat = np.empty(n_cat, dtype=np.int32)
+        number_checked = 0
+        positive_count = 0
+        for t in range(n_train):
+            # Intersection of i test row and t train row
+            for j in range(n_num):
+                a = X_test_num[i, j]
+                b = X_train_num[t, j]
+                if interval_mode == 0:
+                    lo[j] = min(a, b)
+                    hi[j] = max(a, b)
+                elif interval_mode == 1:
+                    lo[j] = min(a, b)
+                    hi[j] = np.inf
+                else:
+                    lo[j] = max(a, b)
+                    hi[j] = np.inf
+            for j in range(n_cat):
+                if X_test_cat[i, j] == X_train_cat[t, j]:
+                    intersection_cat[j] = X_test_cat[i, j]
+                else:
+                    intersection_cat[j] = -1
+
+            # Only train rows inside the narrowest column range can be in the extent
+            candidates = all_rows
+            for j in range(n_num):
+                left = np.searchsorted(sorted_num[j], lo[j], side='left')
+                right = np.searchsorted(sorted_num[j], hi[j], side='right')
+                if right - left < candidates.shape[0]:
+                    candidates = order_num[j, left:right]
+            for j in range(n_cat):
+                if intersection_cat[j] != -1:
+                    left = np.searchsorted(sorted_cat[j], intersection_cat[j], side='left')
+                    right = np.searchsorted(sorted_cat[j], intersection_cat[j], side='right')
+                    if right - left < candidates.shape[0]:
+                        candidates = order_cat[j, left:right]
+
+            # Extent of the intersection
+            extent_size = 0
+            extent_positive = 0
+            # All columns are always checked: validity is folded without data-dependent branches
+            for k in candidates:
+                is_valid = True
+                for j in range(n_num):
+                    is_valid &= (X_train_num[k, j] >= lo[j]) & (X_train_num[k, j] <= hi[j])
+                for j in range(n_cat):
+                    is_valid &= (intersection_cat[j] == -1) | (X_train_cat[k, j] == intersection_cat[j])
+                extent_size += is_valid
+                extent_positive += is_valid * Y_train[k]
+
+            if extent_size < min_extent_size:
+                continue
+            extent_negative = extent_size - extent_positive
+            if extent_negative > extent_positive:
+                if extent_negative / extent_size < consistency_threshold:
+                    continue
+            else:
+                if extent_positive / extent_size < consistency_threshold:
+                    continue
+                positive_count += 1
+            number_checked += 1
+
+            # If enough predictions stop
+            if number_checked >= check_number:
+                break
+
+        negative_count = number_checked - positive_count
+        if number_checked >= min_checked and number_checked > 0 and positive_count != negative_count:
+            winner = np.int8(positive_count > negative_count)
+            confidence_value = max(positive_count, negative_count) / number_checked
+            if confidence_value > consistency_threshold:
+                prediction[i] = winner
+                confidence[i] = confidence_value
+
+    return prediction, confidence
+
 
 class LazyFCA(BaseEstimator, ClassifierMixin):
     def __init__(
@@ -17,13 +145,49 @@ class LazyFCA(BaseEstimator, ClassifierMixin):
             min_extent_size: int = 2,
             check_number: int = 1,
             update_train: bool = False,
-            numerical_preprocessing: Callable = None) -> None:
+            numerical_preprocessing: Callable = None,
+            n_jobs: int = None,
+            num_dtype: type = np.float32,
+            device: str = 'cpu') -> None:
+        """
+        consistency_threshold: float
+            Minimal share of the major target in extent and in checked extents.
+        undefined_treshhold: float
+            Threshold used by undefine scores.
+        min_extent_size: int
+            Minimal size of extent to take its target into account.
+        check_number: int
+            Number of extents with target to check before stop, all train rows if less than 1.
+        update_train: bool
+            Add classified rows to train data or not.
+        numerical_preprocessing: Callable or str
+            'min_inf_interval', 'max_inf_interval' or callable (x, X_block) -> (lo, hi). x is a numerical
+            part of row with shape (n_num, ), X_block is numerical part of train rows with shape
+            (n_block, n_num), lo and hi should broadcast to X_block shape. Callables that work only
+            with scalars (a, b) -> (lo, hi) are detected on first call and applied element-wise, which is slow.
+            By default interval between min and max of values is used.
+        n_jobs: int
+            Number of threads used for prediction, negative values count from all cores like in joblib.
+            None keeps default of the backend: all Numba threads for compiled kernel and
+            one job for joblib with custom numerical_preprocessing.
+        num_dtype: type
+            Floating dtype of numerical columns, np.float32 or np.float64. Integer dtypes
+            are not supported, intervals use np.inf as unbounded side.
+        device: str
+            'cpu' or 'cuda'. 'cuda' needs CuPy, train data is uploaded to GPU in fit and prediction
+            is offloaded when n_train x n_test x n_features is at least GPU_MIN_ELEMENTS.
+            Each test row is still processed separately, GPU computes extents of a whole block
+            of its intersections at once.
+        """
         super().__init__()
         self.consistency_threshold = consistency_threshold
         self.undefined_treshhold = undefined_treshhold
         self.min_extent_size = min_extent_size
         self.check_number = check_number
         self.update_train = update_train
+        self.n_jobs = n_jobs
+        self.num_dtype = num_dtype
+        self.device = device
         if callable(numerical_preprocessing):
             self.numerical_preprocessing = numerical_preprocessing
         elif numerical_preprocessing == 'min_inf_interval':
@@ -40,7 +204,10 @@ class LazyFCA(BaseEstimator, ClassifierMixin):
             "min_extent_size": self.min_extent_size,
             "check_number": self.check_number,
             "update_train": self.update_train,
-            "numerical_preprocessing": self.numerical_preprocessing
+            "numerical_preprocessing": self.numerical_preprocessing,
+            "n_jobs": self.n_jobs,
+            "num_dtype": self.num_dtype,
+            "device": self.device
         }
 
     def set_params(self, **parameters):
@@ -60,8 +227,8 @@ class LazyFCA(BaseEstimator, ClassifierMixin):
         """
         Because we use Lazy model we don't really need fit method. But for compatibility
         with sklearn interfaces we add it for saving data for future predictions.
-        Note: If you use prediction method and give train data to prediction method, 
-        data saved after fitting will be ignored and overwrited.
+        Note: If you use prediction method and give train data to prediction method,
+        data saved after fitting will be ignored for this prediction but kept for next ones.
 
         X_train: array-like
             Array of training examples.
@@ -73,97 +240,402 @@ class LazyFCA(BaseEstimator, ClassifierMixin):
         self:
             Return self for onelines.
         """
-        X, y = check_X_y(X, y, dtype=object)
-        self.classes_ = unique_labels(y)
-        self.X_ = X
-        self.y_ = y
+        self._train_ = self._prepare_train(X, y)
+        if self._check_device():
+            self._train_['gpu'] = LazyFCA._upload_train(self._train_)
+        self.classes_ = self._train_['classes']
+        self.y_ = self.classes_[self._train_['Y']]
         return self
 
-    @staticmethod
-    def _basic_interval(a: float, b: float) -> Tuple[float, float]:
-        return (min(a, b), max(a, b))
+    def _check_device(self) -> bool:
+        """
+        Validate device and return True if GPU can be used.
+        """
+        if self.device not in DEVICES:
+            raise ValueError(f"device should be one of {DEVICES}, got {self.device!r}")
+        if self.device == 'cuda' and cp is None:
+            warnings.warn("CuPy is not installed, prediction is computed on CPU")
+            return False
+        return self.device == 'cuda'
 
     @staticmethod
-    def _min_inf_interval(a: float, b: float) -> Tuple[float, float]:
-        return (min(a, b), float('inf'))
+    def _upload_train(train: dict) -> Tuple:
+        """
+        Copy numerical block, categorical block and labels of train data to GPU.
+        """
+        return tuple(cp.asarray(train[key]) for key in ('X_num', 'X_cat', 'Y'))
+
+    def _prepare_train(self, X, y) -> dict:
+        """
+        Validate training examples, detect column types and remember categories of categorical columns.
+        Train data is stored as separate contiguous numerical and categorical blocks.
+        Nothing is saved to self, so the same method serves fit and train data given to predict.
+        X: array-like
+            Array of training examples.
+        y: array-like
+            Array of labels of training examples.
+
+        Returns
+        -------
+        train: dict
+            classes: np.array
+                Two labels of training examples.
+            num_cols, cat_cols: np.array
+                Indices of numerical and categorical columns.
+            cat_maps: list
+                pd.Index with categories of every categorical column.
+            X_num: np.array
+                num_dtype array with numerical columns.
+            X_cat: np.array
+                int32 array with codes of categorical columns.
+            Y: np.array
+                int64 array of labels mapped to 0 for classes[0] and 1 for classes[1].
+            num_index, cat_index: tuple
+                Column index of numerical and categorical blocks built by _build_column_index.
+        """
+        if not np.issubdtype(self.num_dtype, np.floating):
+            raise ValueError(f"num_dtype should be a floating dtype, got {self.num_dtype}")
+        X_checked, y = check_X_y(X, y, dtype=object)
+        classes = unique_labels(y)
+        if len(classes) != 2:
+            raise ValueError
+        cat_mask = LazyFCA._compute_cat_mask(X, X_checked)
+        num_cols = np.flatnonzero(~cat_mask)
+        cat_cols = np.flatnonzero(cat_mask)
+        X_num, X_str = self._split_columns(X_checked, num_cols, cat_cols)
+
+        # pd.factorize interns values with a hash table in one pass and without sorting
+        X_cat = np.empty(X_str.shape, dtype=np.int32)
+        cat_maps = []
+        for j, column in enumerate(X_str.T):
+            X_cat[:, j], uniques = pd.factorize(column)
+            cat_maps.append(pd.Index(uniques))
+        return {
+            'classes': classes,
+            'num_cols': num_cols,
+            'cat_cols': cat_cols,
+            'cat_maps': cat_maps,
+            'X_num': X_num,
+            'X_cat': X_cat,
+            'Y': (y != classes[0]).astype(np.int64),
+            'num_index': LazyFCA._build_column_index(X_num),
+            'cat_index': LazyFCA._build_column_index(X_cat)
+        }
 
     @staticmethod
-    def _min_max_interval(a: float, b: float) -> Tuple[float, float]:
-        return (max(a, b), float('inf'))
+    def _build_column_index(X: np.array) -> Tuple[np.array, np.array]:
+        """
+        Build sorted index for every column, so rows with values in a range can be found by binary search.
+        X: np.array
+            Array of training examples columns.
 
-    def _compute_instersection(self, x: np.array, x_train: np.array) -> np.array:
+        Returns
+        -------
+        sorted_values: np.array
+            Array with shape (n_columns, n_rows), row j contains sorted values of column j.
+        order: np.array
+            Array with shape (n_columns, n_rows), row j contains indices of rows sorted by column j.
         """
-        Compute intersection between row from dataset for classification and row from data.
-        x: np.array 
-            Row from dataset for classification. Should have shape (1, ).
-        x_train: 
-            Row from test dataset. Should have shape (1, ).
-        
+        order = np.ascontiguousarray(np.argsort(X, axis=0, kind='stable').T)
+        sorted_values = np.ascontiguousarray(np.take_along_axis(X, order.T, axis=0).T)
+        return sorted_values, order
+
+    @staticmethod
+    def _compute_cat_mask(X, X_checked: np.array) -> np.array:
+        """
+        Detect which columns hold categorical (string or boolean) values.
+        Column dtypes of pandas.DataFrame or np.array are used, for object columns
+        type of value in the first row is checked.
+        X: array-like
+            Array of training examples as given by user.
+        X_checked: np.array
+            The same examples converted to object array.
+
         Returns
         -------
-        intersaction: np.array
-            1-D array containg intersection. Should be use as pattern for finding extent.
+        cat_mask: np.array
+            1-D bool array, True for categorical columns.
         """
-        intersection = np.array(x, dtype=object)
+        if isinstance(X, pd.DataFrame):
+            dtypes = list(X.dtypes)
+        else:
+            dtypes = [getattr(X, 'dtype', np.dtype(object))] * X_checked.shape[1]
 
-        for i in range(x.shape[0]):
-            if type(x[i]) is str or type(x[i]) is bool:
-                if x[i] != x_train[i]:
-                    intersection[i] = '*'
+        cat_mask = np.empty(X_checked.shape[1], dtype=bool)
+        for j, dtype in enumerate(dtypes):
+            if dtype == object:
+                cat_mask[j] = isinstance(X_checked[0, j], (str, bool, np.bool_))
             else:
-                intersection[i] = self.numerical_preprocessing(x[i], x_train[i])
+                cat_mask[j] = pd.api.types.is_bool_dtype(dtype) or not pd.api.types.is_numeric_dtype(dtype)
+        return cat_mask
 
-        return intersection
+    def _split_columns(self, X: np.array, num_cols: np.array, cat_cols: np.array) -> Tuple[np.array, np.array]:
+        """
+        Split rows into dense numerical part and categorical part.
+        X: np.array
+            Array of examples. Should have shape (n, m).
+        num_cols, cat_cols: np.array
+            Indices of numerical and categorical columns of train data.
 
-    def _compute_extent_target(self, X_train: np.array, Y_train: np.array, intersection: np.array) -> bool:
+        Returns
+        -------
+        X_num: np.array
+            num_dtype array with numerical columns.
+        X_str: np.array
+            object array with categorical columns.
         """
-        Compute extent label. 
-        X_train: np.array
-            Array of training examples.
+        X_num = np.ascontiguousarray(X[:, num_cols], dtype=self.num_dtype)
+        X_str = X[:, cat_cols]
+        return X_num, X_str
+
+    @staticmethod
+    def _basic_interval(a: np.array, b: np.array) -> Tuple[np.array, np.array]:
+        return (np.minimum(a, b), np.maximum(a, b))
+
+    @staticmethod
+    def _min_inf_interval(a: np.array, b: np.array) -> Tuple[np.array, np.array]:
+        return (np.minimum(a, b), np.full_like(a, np.inf))
+
+    @staticmethod
+    def _min_max_interval(a: np.array, b: np.array) -> Tuple[np.array, np.array]:
+        return (np.maximum(a, b), np.full_like(a, np.inf))
+
+    def _interval_mode(self) -> int or None:
+        """
+        Return code of built-in numerical_preprocessing for compiled kernel or None for custom one.
+        Custom callables can't be compiled, they are called on NumPy arrays in Python loop.
+        """
+        return {
+            LazyFCA._basic_interval: 0,
+            LazyFCA._min_inf_interval: 1,
+            LazyFCA._min_max_interval: 2
+        }.get(self.numerical_preprocessing)
+
+    def _kernel_num_threads(self) -> int or None:
+        """
+        Return number of Numba threads for compiled kernel from n_jobs or None to keep current one.
+        """
+        if self.n_jobs is None:
+            return None
+        max_threads = numba_config.NUMBA_NUM_THREADS
+        if self.n_jobs < 0:
+            return max(1, max_threads + 1 + self.n_jobs)
+        return max(1, min(self.n_jobs, max_threads))
+
+    def _resolve_interval(self, x_num: np.array, X_seed_num: np.array) -> Tuple[Callable, bool]:
+        """
+        Check that numerical_preprocessing works with (row, block) arrays,
+        otherwise wrap it to be applied element-wise.
+        x_num: np.array
+            Numerical part of row. Should have shape (n_num, ).
+        X_seed_num: np.array
+            Numerical part of a few train rows. Should have shape (n_seed, n_num).
+
+        Returns
+        -------
+        interval: Callable
+            numerical_preprocessing itself or its element-wise wrapper.
+        is_vectorized: bool
+            False if numerical_preprocessing was wrapped.
+        """
+        interval = self.numerical_preprocessing
+        try:
+            lo, hi = interval(x_num, X_seed_num)
+            np.broadcast_to(lo, X_seed_num.shape)
+            np.broadcast_to(hi, X_seed_num.shape)
+            return interval, True
+        except (TypeError, ValueError):
+            return np.vectorize(interval, otypes=[X_seed_num.dtype] * 2), False
+
+    @staticmethod
+    def _encode_categorical(X_str: np.array, cat_maps: list) -> np.array:
+        """
+        Encode categorical columns with int32 codes of categories remembered from train data.
+        Values unknown for train data get negative codes less than -1, -1 is reserved for '*'.
+        X_str: np.array
+            object array with categorical columns.
+        cat_maps: list
+            pd.Index with categories of every categorical column of train data.
+
+        Returns
+        -------
+        X_cat: np.array
+            int32 array with codes of categorical values.
+        """
+        X_cat = np.empty(X_str.shape, dtype=np.int32)
+        for j, categories in enumerate(cat_maps):
+            codes = categories.get_indexer(X_str[:, j])
+            unknown = codes == -1
+            if np.any(unknown):
+                codes[unknown] = -2 - pd.factorize(X_str[unknown, j])[0]
+            X_cat[:, j] = codes
+        return X_cat
+
+    def _compute_instersection(
+            self,
+            interval: Callable,
+            x_num: np.array,
+            x_cat: np.array,
+            X_seed_num: np.array,
+            X_seed_cat: np.array
+    ) -> Tuple[np.array, np.array, np.array]:
+        """
+        Compute intersections between row from dataset for classification and block of rows from data.
+        All numerical columns are processed at once by numerical_preprocessing.
+        interval: Callable
+            numerical_preprocessing resolved by _resolve_interval.
+        x_num: np.array
+            Numerical part of row from dataset for classification. Should have shape (n_num, ).
+        x_cat: np.array
+            Categorical codes of row from dataset for classification. Should have shape (n_cat, ).
+        X_seed_num: np.array
+            Numerical part of rows from train dataset. Should have shape (n_seed, n_num).
+        X_seed_cat: np.array
+            Categorical codes of rows from train dataset. Should have shape (n_seed, n_cat).
+
+        Returns
+        -------
+        lo, hi: np.array
+            Lower and upper bounds of numerical intervals, one row per seed.
+        cat_match: np.array
+            Bits of categorical columns, one row per seed. Bit is set if seed equals to x
+            in the column, so intersection keeps x value, otherwise it is '*'.
+            Bits are packed by np.packbits for NumPy arrays and kept as bool for GPU arrays.
+        """
+        lo, hi = interval(x_num, X_seed_num)
+        lo = np.broadcast_to(lo, X_seed_num.shape)
+        hi = np.broadcast_to(hi, X_seed_num.shape)
+        cat_match = X_seed_cat == x_cat
+        if isinstance(cat_match, np.ndarray):
+            cat_match = np.packbits(cat_match, axis=1)
+        return lo, hi, cat_match
+
+    def _compute_extent_target(
+            self,
+            X_train_num: np.array,
+            train_cat_match: np.array,
+            Y_train: np.array,
+            intersection: Tuple[np.array, np.array, np.array]
+    ) -> np.array:
+        """
+        Compute extent labels for block of intersections in one sweep over training examples.
+        X_train_num: np.array
+            Numerical columns of training examples.
+        train_cat_match: np.array
+            Packed bits of categorical columns where training examples equal to x.
         Y_train: np.array
             Array of labels of training examples. Labels should be 0 or 1.
-        intersection: np.array
-            Intersection that is used as pattern for computing extent. Should have shape (1, )
+        intersection: tuple
+            Intersections (lo, hi, cat_match) that are used as patterns for computing extents.
 
         Returns
         -------
-        target: object
-            Return target if extent have persent of this target more then threshold
-            otherwise return None, object can't be classified from this extent.
+        target: np.array
+            int8 array with target for each intersection if extent have persent of this target
+            more then threshold otherwise -1, object can't be classified from this extent.
         """
-        positive_count = 0
-        negative_count = 0
-
-        for i in range(X_train.shape[0]):
-            is_valid = True
-            for j in range(X_train.shape[1]):
-                if type(X_train[i][j]) is str or type(X_train[i][j]) is bool:
-                    if intersection[j] != '*' and X_train[i][j] != intersection[j]:
-                        is_valid = False
-                        break
-                else:
-                    if X_train[i][j] < intersection[j][0] or X_train[i][j] > intersection[j][1]:
-                        is_valid = False
-                        break
+        lo, hi, cat_match = intersection
 
-            if is_valid:
-                if Y_train[i]:
-                    positive_count += 1
-                else:
-                    negative_count += 1
+        # is_valid has shape (n_train, n_seed). Train row fits categorical part
+        # if it equals to x in every column kept by the intersection.
+        is_valid = ~np.any((X_train_num[:, None] < lo) | (X_train_num[:, None] > hi), axis=2)
+        is_valid &= ~np.any(cat_match & ~train_cat_match[:, None], axis=2)
 
-        extent_size = positive_count + negative_count
-        if extent_size < self.min_extent_size:
-            return None
+        extent_size = np.count_nonzero(is_valid, axis=0)
+        positive_count = np.count_nonzero(is_valid[Y_train == 1], axis=0)
+        negative_count = extent_size - positive_count
 
-        if negative_count > positive_count:
-            if negative_count / extent_size >= self.consistency_threshold:
-                return False
-        else:
-            if positive_count / extent_size >= self.consistency_threshold:
-                return True
+        target = (positive_count >= negative_count).astype(np.int8)
+        target_count = np.where(target, positive_count, negative_count)
+        consistency = target_count / np.maximum(extent_size, 1)
+        target[(extent_size < self.min_extent_size) | (consistency < self.consistency_threshold)] = -1
+        return target
 
-        return None
+    def _iter_extent_targets(
+            self,
+            interval: Callable,
+            x_num: np.array,
+            x_cat: np.array,
+            X_train_num: np.array,
+            X_train_cat: np.array,
+            Y_train: np.array,
+            first_block_size: int = SEED_BLOCK_SIZE,
+            max_block_size: int = SEED_BLOCK_SIZE
+    ) -> Iterator[int]:
+        """
+        Yield extent target of intersection of row with every train row in train data order.
+        Intersections with all train rows are computed at once, extents are computed in blocks
+        starting from first_block_size and doubling up to max_block_size, so consumer that
+        stops early doesn't pay for a whole block.
+        """
+        # Categorical part of intersection with train row is the same bits as used for extent check
+        lo, hi, cat_match = self._compute_instersection(interval, x_num, x_cat, X_train_num, X_train_cat)
+        # Array type is fixed for the whole sweep, so it is checked once and not for every block
+        to_host = np.asarray if isinstance(X_train_num, np.ndarray) else cp.asnumpy
+        start = 0
+        block_size = max(1, min(first_block_size, max_block_size))
+        while start < X_train_num.shape[0]:
+            seeds = slice(start, start + block_size)
+            intersection = (lo[seeds], hi[seeds], cat_match[seeds])
+            yield from to_host(self._compute_extent_target(X_train_num, cat_match, Y_train, intersection))
+            start += block_size
+            block_size = min(2 * block_size, max_block_size)
+
+    def _predict_one(
+            self,
+            interval: Callable,
+            x_num: np.array,
+            x_cat: np.array,
+            X_train_num: np.array,
+            X_train_cat: np.array,
+            Y_train: np.array,
+            check_number: int,
+            max_block_size: int = SEED_BLOCK_SIZE
+    ) -> Tuple[int, float]:
+        """
+        Predict label for one row base on X_train and Y_train.
+        interval: Callable
+            numerical_preprocessing resolved by _resolve_interval.
+        x_num, x_cat: np.array
+            Numerical and categorical parts of row to make prediction for.
+        X_train_num, X_train_cat: np.array
+            Numerical and categorical parts of training examples.
+        Y_train: np.array
+            Array of labels of training examples. Labels should be 0 or 1.
+        check_number: int
+            Number of extents with target to check before stop.
+        max_block_size: int
+            Maximal number of train rows intersected with the row at once.
+
+        Returns
+        -------
+        label, confidence: int, float
+            Predicted label 0 or 1 and its confidence or (-1, nan) if row can't be classified.
+        """
+        number_checked = 0
+        target_count = np.zeros(2, dtype=np.int64)
+        extent_targets = self._iter_extent_targets(
+            interval, x_num, x_cat, X_train_num, X_train_cat, Y_train,
+            first_block_size=check_number, max_block_size=max_block_size
+        )
+        for extent_target in extent_targets:
+            if extent_target < 0:
+                continue
+            target_count[extent_target] += 1
+            number_checked += 1
+
+            # If enough predictions stop
+            if number_checked >= check_number:
+                break
+
+        # If enough targets predicted count avg prediction
+        if number_checked >= self.check_number and number_checked > 0 and target_count[0] != target_count[1]:
+            winner = int(target_count[1] > target_count[0])
+            confidence_value = target_count[winner] / number_checked
+            if confidence_value > self.consistency_threshold:
+                return winner, confidence_value
+
+        return -1, np.nan
 
     def predict(
             self,
@@ -183,7 +655,8 @@ class LazyFCA(BaseEstimator, ClassifierMixin):
         Y_train: np.array
             Array of labels of training examples
         confidence: bool
-            Return confidence of prediction or not.
+            Save confidence of prediction to confidence_ or not.
+            confidence_ is float32 array, nan for rows that are not classified.
         verbose: bool
             Show step by step log or not.
         generator: bool
@@ -192,86 +665,91 @@ class LazyFCA(BaseEstimator, ClassifierMixin):
         Return
         ------
         prediction: np.array or Iterator
-            Python generator with predictions for each x in X[n_train:]. 
+            Array or iterator with predictions for each x in X.
             If label can't be predict return None.
         """
         if X_train is None or Y_train is None:
             check_is_fitted(self)
-            X_train = self.X_
-            Y_train = self.y_
+            train = self._train_
         else:
-            X_train, Y_train = check_X_y(X_train, Y_train, dtype=object)
-            self.classes_ = unique_labels(Y_train)
+            train = self._prepare_train(X_train, Y_train)
+        X_train_num, X_train_cat, Y_train = train['X_num'], train['X_cat'], train['Y']
 
         X = check_array(X, dtype=object)
-
-        if len(self.classes_) < 2 or len(self.classes_) > 2:
-            raise ValueError
-
-        # Binarised Y_train
-        if self.classes_[0] not in {0, 1} or self.classes_[1] not in {0, 1}:
-            Y_train = np.where(Y_train == self.classes_[0], 0, 1)
+        X_num, X_str = self._split_columns(X, train['num_cols'], train['cat_cols'])
+        X_cat = LazyFCA._encode_categorical(X_str, train['cat_maps'])
 
         if self.check_number < 1:
-            check_number = X_train.shape[0]
+            check_number = X_train_num.shape[0]
         else:
             check_number = self.check_number
-        prediction = np.empty(X.shape[0], dtype=np.object_)
-        self.confidence_ = np.empty(X.shape[0], dtype=np.object_)
 
-        for i, x in tqdm(
-                enumerate(X),
-                initial=0, total=len(X),
+        n_elements = X_train_num.shape[0] * X.shape[0] * max(1, X.shape[1])
+        use_gpu = self._check_device() and n_elements >= GPU_MIN_ELEMENTS
+
+        interval_mode = self._interval_mode()
+        if interval_mode is not None and not self.update_train and not use_gpu:
+            num_threads = self._kernel_num_threads()
+            previous_num_threads = get_num_threads()
+            if num_threads is not None:
+                set_num_threads(num_threads)
+            try:
+                labels, confidence_values = _predict_kernel(
+                    X_num, X_cat, X_train_num, X_train_cat, Y_train,
+                    *train['num_index'], *train['cat_index'],
+                    interval_mode, self.min_extent_size, self.consistency_threshold,
+                    check_number, self.check_number
+                )
+            finally:
+                set_num_threads(previous_num_threads)
+        else:
+            labels = np.full(X.shape[0], -1, dtype=np.int8)
+            confidence_values = np.full(X.shape[0], np.nan, dtype=np.float32)
+            max_block_size = SEED_BLOCK_SIZE
+            interval, is_vectorized = self._resolve_interval(X_num[0], X_train_num[:2])
+            if use_gpu and not is_vectorized:
+                warnings.warn("numerical_preprocessing is not vectorized, prediction is computed on CPU")
+                use_gpu = False
+            if use_gpu:
+                # Whole blocks of seeds are compared in one GPU kernel, so blocks are much bigger
+                X_train_num, X_train_cat, Y_train = train['gpu'] if 'gpu' in train else LazyFCA._upload_train(train)
+                X_num, X_cat = cp.asarray(X_num), cp.asarray(X_cat)
+                row_size = X_train_num.shape[0] * max(1, X_train_num.shape[1] + X_train_cat.shape[1])
+                max_block_size = max(SEED_BLOCK_SIZE, GPU_BLOCK_ELEMENTS // row_size)
+            rows = tqdm(
+                enumerate(zip(X_num, X_cat)),
+                initial=0, total=X.shape[0],
                 desc="Predicting data....",
                 disable=not verbose
-        ):
-            number_checked = 0
-            negative_count = 0
-            positive_count = 0
-            for x_train in X_train:
-                # Try to predict base on intersection of i train data row
-                intersection = self._compute_instersection(x, x_train)
-                extent_target = self._compute_extent_target(X_train, Y_train, intersection)
-                if extent_target is None:
-                    continue
-                elif extent_target:
-                    positive_count += 1
-                    number_checked += 1
-                else:
-                    negative_count += 1
-                    number_checked += 1
-
-                # If enough predictions stop
-                if number_checked >= check_number:
-                    break
-
-            # If enough targets predicted count avg prediction and save confidence if needed
-            is_classified = False
-            if positive_count + negative_count >= self.check_number and number_checked > 0:
-                if negative_count > positive_count:
-                    confidence_value = negative_count / number_checked
-                    if confidence_value > self.consistency_threshold:
-                        prediction[i] = self.classes_[0]
-                        is_classified = True
-                elif positive_count > negative_count:
-                    confidence_value = positive_count / number_checked
-                    if confidence_value > self.consistency_threshold:
-                        prediction[i] = self.classes_[1]
-                        is_classified = True
-
-            if is_classified:
-                if confidence:
-                    self.confidence_[i] = confidence_value
-                if self.update_train:
-                    X_train = np.append(X_train, x.reshape(1, x.shape[0]), axis=0)
-                    Y_train = np.append(Y_train, prediction[i])
-                    if self.check_number < 1:
-                        check_number += 1
+            )
+            if self.update_train or use_gpu:
+                for i, (x_num, x_cat) in rows:
+                    labels[i], confidence_values[i] = self._predict_one(
+                        interval, x_num, x_cat, X_train_num, X_train_cat, Y_train, check_number, max_block_size
+                    )
+                    if self.update_train and labels[i] >= 0:
+                        X_train_num = np.append(X_train_num, x_num.reshape(1, -1), axis=0)
+                        X_train_cat = np.append(X_train_cat, x_cat.reshape(1, -1), axis=0)
+                        Y_train = np.append(Y_train, labels[i])
+                        if self.check_number < 1:
+                            check_number += 1
             else:
-                prediction[i] = None
-                if confidence:
-                    self.confidence_[i] = None
-
-            yield prediction[i]
-        if not generator:
-            return prediction
+                # Test rows are independent and NumPy releases GIL, so threads are enough
+                results = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+                    delayed(self._predict_one)(interval, x_num, x_cat, X_train_num, X_train_cat, Y_train, check_number)
+                    for _, (x_num, x_cat) in rows
+                )
+                for i, (label, confidence_value) in enumerate(results):
+                    labels[i] = label
+                    confidence_values[i] = confidence_value
+
+        is_classified = labels >= 0
+        prediction = np.empty(X.shape[0], dtype=np.object_)
+        prediction[is_classified] = train['classes'][labels[is_classified]]
+        if not confidence:
+            confidence_values.fill(np.nan)
+        self.confidence_ = confidence_values
+
+        if generator:
+            return iter(prediction)
+        return prediction